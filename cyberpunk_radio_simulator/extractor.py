@@ -27,8 +27,13 @@ Extract logic from game scenes, and audio files.
 #
 
 # stdlib
+import mmap
+import os
+from contextlib import ExitStack
 from io import BytesIO
-from typing import IO
+from pathlib import PureWindowsPath
+from types import TracebackType
+from typing import IO, cast
 
 # 3rd party
 from cp2077_extractor.audio_data import SceneAudioData
@@ -41,15 +46,17 @@ from cp2077_extractor.radio_dj import (
 		parse_radio_scene_graph,
 		parse_subtitles
 		)
-from cp2077_extractor.redarchive_reader import REDArchive
+from cp2077_extractor.redarchive_reader import FileRecord, REDArchive
 from cp2077_extractor.utils import transcode_file
 from cyberpunk_radio_extractor import extract_radio_songs
 from cyberpunk_radio_extractor.album_art import AlbumArt
 from domdf_python_tools.paths import PathPlus, TemporaryPathPlus
 from domdf_python_tools.typing import PathLike
+from fnvhash import fnv1a_64  # type: ignore[import-untyped]
 from moviepy.audio.AudioClip import CompositeAudioClip, concatenate_audioclips  # type: ignore[import-untyped]
 from moviepy.audio.io.AudioFileClip import AudioFileClip  # type: ignore[import-untyped]
 from networkx import Graph
+from typing_extensions import Self
 
 # this package
 from cyberpunk_radio_simulator.data import advert_scenes, dj_scenes, djs
@@ -110,6 +117,59 @@ class Directories:
 			self.album_art_directory.maybe_make(parents=True)
 
 
+class ArchiveHandles:
+	"""
+	Open file handles for ``.archive`` files, shared between extractions.
+
+	Each archive is opened the first time it is requested, and all are closed when the context manager exits.
+	The archives are memory-mapped, so extracting a file is a copy from the page cache
+	rather than a ``seek()`` and ``read()`` on the file.
+	"""
+
+	def __init__(self) -> None:
+		self._exit_stack = ExitStack()
+		self._handles: dict[str, IO[bytes]] = {}
+
+	def get(self, archive_file: PathPlus) -> IO[bytes]:
+		"""
+		Returns the open file handle for the given archive, opening it if necessary.
+
+		:param archive_file:
+		"""
+
+		key = os.fspath(archive_file)
+		if key not in self._handles:
+			self._handles[key] = self._open(archive_file)
+
+		return self._handles[key]
+
+	def _open(self, archive_file: PathPlus) -> IO[bytes]:
+		fp = self._exit_stack.enter_context(archive_file.open("rb"))
+		mm = self._exit_stack.enter_context(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+
+		# mmap provides the seek() and read() methods REDArchive.extract_file needs.
+		return cast(IO[bytes], mm)
+
+	def close(self) -> None:
+		"""
+		Close all open archive files.
+		"""
+
+		self._exit_stack.close()
+		self._handles.clear()
+
+	def __enter__(self) -> Self:
+		return self
+
+	def __exit__(
+			self,
+			exc_type: type[BaseException] | None,
+			exc_val: BaseException | None,
+			exc_tb: TracebackType | None,
+			) -> None:
+		self.close()
+
+
 class Extractor(Directories):
 	"""
 	Extract game data.
@@ -132,8 +192,12 @@ class Extractor(Directories):
 
 	aa: AlbumArt
 
+	#: Mapping of filename hashes to file records, for each archive searched so far (keyed by ``id(archive)``).
+	_file_indexes: dict[int, dict[int, FileRecord]]
+
 	def __init__(self, install_directory: PathLike, output_directory: PathLike = "data"):
 		self.output_directory = PathPlus(output_directory)
+		self._file_indexes = {}
 
 		self.prepare_directories(True)
 
@@ -158,11 +222,36 @@ class Extractor(Directories):
 		self.lang_en_voice_archive = REDArchive.load_archive(self.lang_en_voice_archive_file)
 		self.audio_general_archive = REDArchive.load_archive(self.audio_general_archive_file)
 
+	def find_file(self, archive: REDArchive, filename: str) -> FileRecord:
+		"""
+		Find the record for the given filename, relative to the root of the archive (usually starting ``base``).
+
+		Equivalent to ``archive.file_list.find_filename(filename)``, but the archive's records are indexed
+		by name hash the first time it is searched, rather than scanning every record on each call.
+
+		:param archive:
+		:param filename:
+		"""
+
+		index = self._file_indexes.get(id(archive))
+		if index is None:
+			# Reversed so the first record wins for duplicate hashes, as with ``find_filename``.
+			index = {record.name_hash: record for record in reversed(archive.file_list.file_records)}
+			self._file_indexes[id(archive)] = index
+
+		name_hash = fnv1a_64(bytes(PureWindowsPath(filename)))
+		try:
+			return index[name_hash]
+		except KeyError:
+			raise FileNotFoundError(filename) from None
+
 	def concatenate_advert_audio_clips(
 			self,
 			events: list[EventData],
 			ad_data: SceneAudioData,
 			output_file: PathPlus,
+			archive_handles: ArchiveHandles | None = None,
+			tmpdir: PathPlus | None = None,
 			) -> None:
 		"""
 		Extract individual audio files and combine together into a single file.
@@ -170,20 +259,31 @@ class Extractor(Directories):
 		:param events:
 		:param ad_data:
 		:param output_file:
+		:param archive_handles: Open archive files to extract from.
+			If not given the archive is opened for the duration of the call.
+		:param tmpdir: Directory for intermediate files.
+			If not given a temporary directory is created for the duration of the call.
 		"""
 
-		audio_filename_prefix = ad_data.audio_filename_prefix + '_'
+		with ExitStack() as stack:
+			if archive_handles is None:
+				archive_handles = stack.enter_context(ArchiveHandles())
+			if tmpdir is None:
+				tmpdir = stack.enter_context(TemporaryPathPlus())
 
-		if ad_data.general_audio:
-			archive_file = self.audio_general_archive_file
-			archive = self.audio_general_archive
-			directory = r"base\localization\common\vo"
-		else:
-			archive_file = self.lang_en_voice_archive_file
-			archive = self.lang_en_voice_archive
-			directory = r"base\localization\en-us\vo"
+			audio_filename_prefix = ad_data.audio_filename_prefix + '_'
+
+			if ad_data.general_audio:
+				archive_file = self.audio_general_archive_file
+				archive = self.audio_general_archive
+				directory = r"base\localization\common\vo"
+			else:
+				archive_file = self.lang_en_voice_archive_file
+				archive = self.lang_en_voice_archive
+				directory = r"base\localization\en-us\vo"
+
+			fp = archive_handles.get(archive_file)
 
-		with archive_file.open("rb") as fp, TemporaryPathPlus() as tmpdir:
 			audio_filenames: list[PathPlus] = []
 			for event in events:
 				event_filename = fr"{directory}\{audio_filename_prefix}{event.audio_file_suffix.lower()}.wem"
@@ -192,7 +292,8 @@ class Extractor(Directories):
 					if event.audio_file_suffix.lower() == "f_1b8d42f0a04ea000":
 						event_filename = event_filename.replace("female", "male")
 
-				mp3_filename = tmpdir / f"{event.audio_file_suffix}.mp3"
+				# The prefix keeps filenames unique when the directory is shared between scenes.
+				mp3_filename = tmpdir / f"{audio_filename_prefix}{event.audio_file_suffix}.mp3"
 				self.extract_audio(archive, fp, event_filename, mp3_filename)
 				audio_filenames.append(mp3_filename)
 
@@ -200,6 +301,11 @@ class Extractor(Directories):
 				clips = [AudioFileClip(c) for c in audio_filenames]
 				final_clip: CompositeAudioClip = concatenate_audioclips(clips)
 				final_clip.write_audiofile(output_file)
+
+				for clip in clips:
+					clip.close()
+				for filename in audio_filenames:
+					filename.unlink(missing_ok=True)
 			else:
 				audio_filenames[0].move(output_file.abspath())
 
@@ -214,10 +320,11 @@ class Extractor(Directories):
 		"""
 
 		wem_filename = mp3_filename.with_suffix(".wem")
-		file = archive.file_list.find_filename(filename)
+		file = self.find_file(archive, filename)
 		contents = archive.extract_file(fp, file)
 		wem_filename.write_bytes(contents)
 		transcode_file(wem_filename, mp3_filename)
+		wem_filename.unlink()
 
 	def extract_advert_audio(self, verbose: bool = False) -> dict[str, tuple[Graph, dict[int, list[EventData]]]]:
 		"""
@@ -228,13 +335,14 @@ class Extractor(Directories):
 
 		advert_graphs: dict[str, tuple[Graph, dict[int, list[EventData]]]] = {}
 
-		with self.gamedata_archive_file.open("rb") as gamedata_fp:
+		with ArchiveHandles() as archive_handles, TemporaryPathPlus() as tmpdir:
+			gamedata_fp = archive_handles.get(self.gamedata_archive_file)
 
 			for ad_name, ad_data in adverts.items():
 				if verbose:
 					print(ad_data, ad_name)
 
-				file = self.gamedata_archive.file_list.find_filename(advert_scenes[ad_data.scene_file])
+				file = self.find_file(self.gamedata_archive, advert_scenes[ad_data.scene_file])
 				crw2_file = parse_cr2w_buffer(BytesIO(self.gamedata_archive.extract_file(gamedata_fp, file)))
 
 				graph, audio_events = parse_radio_scene_graph(crw2_file)
@@ -244,7 +352,7 @@ class Extractor(Directories):
 
 					output_file = self.advert_audio_directory / f"{ad_name}.mp3"
 					if not output_file.is_file():
-						self.concatenate_advert_audio_clips(events, ad_data, output_file)
+						self.concatenate_advert_audio_clips(events, ad_data, output_file, archive_handles, tmpdir)
 
 				advert_graphs[ad_name] = (graph, audio_events)
 
@@ -257,12 +365,13 @@ class Extractor(Directories):
 
 		dj_graphs: dict[str, tuple[Graph, dict[int, list[EventData]]]] = {}
 
-		with self.gamedata_archive_file.open("rb") as gamedata_fp:
+		with ArchiveHandles() as archive_handles, TemporaryPathPlus() as tmpdir:
+			gamedata_fp = archive_handles.get(self.gamedata_archive_file)
 
 			for dj_name, dj_data in djs.items():
 				print(dj_data)
 
-				file = self.gamedata_archive.file_list.find_filename(dj_scenes[dj_data.scene_file])
+				file = self.find_file(self.gamedata_archive, dj_scenes[dj_data.scene_file])
 				crw2_file = parse_cr2w_buffer(BytesIO(self.gamedata_archive.extract_file(gamedata_fp, file)))
 
 				subtitles = parse_subtitles(crw2_file)
@@ -275,7 +384,7 @@ class Extractor(Directories):
 				for node_id, events in audio_events.items():
 					output_file = output_dir / f"{node_id}_{len(events)}.mp3"
 					if not output_file.is_file():
-						self.concatenate_advert_audio_clips(events, dj_data, output_file)
+						self.concatenate_advert_audio_clips(events, dj_data, output_file, archive_handles, tmpdir)
 
 				lone_nodes, start_nodes, end_nodes = find_graph_entry_points(graph)
 				combinations = list(get_link_paths(graph))
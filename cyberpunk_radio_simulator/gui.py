@@ -27,6 +27,7 @@ Textual terminal GUI for playback.
 #
 
 # stdlib
+import itertools
 import os
 import random
 from dataclasses import dataclass
@@ -459,8 +460,13 @@ class RadioportApp(App):
 		self.radio.log_widget = self._main_screen.query_one("#log", SubtitleLog)
 		track_info_label = self._main_screen.query_one("#track-info", Label)
 
-		for event in self.station.get_events(force_jingle=force_jingle):
+		# The radio is reused between stations, so don't time the first event from the last station's.
+		self.radio.reset_start_delay()
+
+		station_events = self.station.get_events(force_jingle=force_jingle)
+		for event, next_event in itertools.pairwise(station_events):
 			# TODO: save state when changing station
+			self.radio.prefetch(next_event.audio_files[0])
 			self.track_info = TrackInfo.from_event(event)
 			track_info_label.update(str(self.track_info))
 			self.set_timer(0.5, self.media_control.on_playback)
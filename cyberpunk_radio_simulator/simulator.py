@@ -28,18 +28,24 @@ Radio playback logic.
 
 # stdlib
 import asyncio
+import functools
+import itertools
 import os
 import random
 import textwrap
+import threading
 import time
-from collections.abc import Callable, Coroutine, Iterator
+from collections.abc import Callable, Coroutine, Iterator, Sequence
+from typing import NamedTuple
 
 # 3rd party
+import orjson
 from cp2077_extractor.audio_data.adverts import adverts
 from cp2077_extractor.audio_data.radio_stations import radio_jingle_ids, radio_stations
 from cp2077_extractor.radio_dj import EventData, load_events_dict
 from cp2077_extractor.track import Track
 from cp2077_extractor.utils import InfiniteList, to_snake_case
+from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.typing import PathLike
 from just_playback import Playback  # type: ignore[import-untyped]
 from notify_rs import URGENCY_NORMAL
@@ -53,6 +59,25 @@ from cyberpunk_radio_simulator.notifications import NotificationSender
 __all__ = ["AsyncRadio", "Radio", "RadioStation"]
 
 
+_log_wrapper = textwrap.TextWrapper(subsequent_indent="  ")
+
+
+@functools.lru_cache(maxsize=256)
+def _wrap_message(msg: str) -> str:
+	# DJ links and status messages repeat, so the wrapped text is cached.
+	return _log_wrapper.fill(msg)
+
+
+def _read_file(filename: PathLike) -> None:
+	# Read (and discard) the file so it is in the operating system's cache.
+	try:
+		with open(filename, "rb") as fp:
+			while fp.read(1 << 20):
+				pass
+	except OSError:
+		pass
+
+
 def random_third_chance() -> bool:
 	"""
 	Like ``random.getrandbits(1)`` but returns truthy 1/3 of the time.
@@ -65,6 +90,51 @@ def random_third_chance() -> bool:
 		return not result
 
 
+class _DJData(NamedTuple):
+	"""
+	DJ data extracted from the game.
+	"""
+
+	subtitles: dict[str, str]
+	audio_events: dict[int, list[EventData]]
+	link_paths: list[list[int]]
+	end_nodes: list[int]
+
+	#: The subtitles for each node's events, joined by newlines.
+	node_subtitles: dict[int, str]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_dj_data(dj_data_directory: str, audio_filename_prefix: str) -> _DJData:
+	"""
+	Load the DJ data extracted from the game.
+
+	The result is cached so switching back to a station doesn't parse the JSON again.
+	The returned objects are shared between callers and must not be modified.
+
+	:param dj_data_directory:
+	:param audio_filename_prefix:
+	"""
+
+	dj_data_file = PathPlus(dj_data_directory).joinpath(audio_filename_prefix + "_data.json")
+	dj_data = orjson.loads(dj_data_file.read_bytes())
+	subtitles: dict[str, str] = dj_data["subtitles"]
+	audio_events = load_events_dict(dj_data["audio_events"])
+
+	node_subtitles = {
+			node: '\n'.join(subtitles[event.subtitle_ruid] for event in events)
+			for node, events in audio_events.items()
+			}
+
+	return _DJData(
+			subtitles=subtitles,
+			audio_events=audio_events,
+			link_paths=dj_data["link_paths"],
+			end_nodes=dj_data["end_nodes"],
+			node_subtitles=node_subtitles,
+			)
+
+
 class RadioStation(Directories):
 	"""
 	Emits events to simulate playing a radio station.
@@ -81,30 +151,77 @@ class RadioStation(Directories):
 	audio_events: dict[int, list[EventData]]
 	subtitles: dict[str, str]
 
+	#: Directory containing this station's tunes and jingles.
+	station_audio_directory: PathPlus
+
+	#: Directory containing this station's DJ links, if it has a DJ.
+	station_dj_audio_directory: PathPlus | None
+
+	#: Absolute path to the station's logo (in white).
+	station_logo_file: PathPlus
+
+	#: Absolute path to the station's album art-style logo.
+	album_art_file: PathPlus
+
 	_last_non_tune_action: type[Event] | None
 
+	#: The subtitles for each DJ node's events, joined by newlines.
+	_node_subtitles: dict[int, str]
+
+	#: The audio file for each DJ node, populated as they are played.
+	_node_audio_files: dict[int, PathPlus]
+
+	#: The audio file for each of the station's tunes, keyed by the track's ``wem_name``.
+	_tune_audio_files: dict[int, PathPlus]
+
+	#: The audio file for each advert.
+	_advert_audio_files: dict[str, PathPlus]
+
 	def __init__(self, station: StationData, output_directory: PathLike = "data"):
 		super().__init__(output_directory)
 		self.station = station
 		self._last_non_tune_action = None
 
-		self.track_list = InfiniteList(list(radio_stations[self.station.name]))
+		self.station_audio_directory = self.stations_audio_directory / self.station.name
+		if station.dj:
+			self.station_dj_audio_directory = self.dj_audio_directory / station.dj.station_name
+		else:
+			self.station_dj_audio_directory = None
+
+		self.station_logo_file = self.station_logos_directory.abspath() / f"{self.station.name}.png"
+		self.album_art_file = self.album_art_directory.abspath() / f"{self.station.name}.png"
+
+		tracks = radio_stations[self.station.name]
+		# InfiniteList takes its own copy of the list, so there's no need to copy lists before passing them in.
+		self.track_list = InfiniteList(tracks)
 		self.ad_list = InfiniteList(list(adverts.keys()))
 
+		# Track.filename_stub is recalculated on every access, so build the filenames once.
+		self._tune_audio_files = {
+				song.wem_name: self.station_audio_directory / f"{song.filename_stub}.mp3"
+				for song in tracks
+				}
+		self._advert_audio_files = {advert: self.advert_audio_directory / f"{advert}.mp3" for advert in adverts}
+
+		self._node_audio_files = {}
+
 		if station.dj:
-			dj_data = self.dj_data_directory.joinpath(station.dj.audio_filename_prefix + "_data.json").load_json()
-			self.subtitles = dj_data["subtitles"]
-			self.audio_events = load_events_dict(dj_data["audio_events"])
-			# link_list = list(p for p in dj_data["link_paths"] if len(p) > 1),
-			link_list = list(p for p in dj_data["link_paths"])
-			jingle_list = dj_data["end_nodes"]
+			dj_data = _load_dj_data(os.fspath(self.dj_data_directory), station.dj.audio_filename_prefix)
+			self.subtitles = dj_data.subtitles
+			self.audio_events = dj_data.audio_events
+			self._node_subtitles = dj_data.node_subtitles
+			# link_list = list(p for p in dj_data.link_paths if len(p) > 1),
+			link_list: list[list[int]] = dj_data.link_paths
+			jingle_list: Sequence[int] = dj_data.end_nodes
 		else:
 			self.subtitles = {}
 			self.audio_events = {}
+			self._node_subtitles = {}
 			link_list = []
 			jingle_list = radio_jingle_ids.get(station.name, ())
 
-		self.link_list = InfiniteList(list(link_list))
+		self.link_list = InfiniteList(link_list)
+		# radio_jingle_ids contains tuples, which InfiniteList can't repopulate from.
 		self.jingle_list = InfiniteList(list(jingle_list))
 
 	@property
@@ -125,9 +242,8 @@ class RadioStation(Directories):
 		while remaining_song_count:
 			song: Track = self.track_list.pop()
 			remaining_song_count -= 1
-			filename = self.stations_audio_directory / self.station.name / f"{song.filename_stub}.mp3"
 			yield Tune(
-					audio_files=[filename],
+					audio_files=[self._tune_audio_files[song.wem_name]],
 					subtitles=[f"{song.artist} – {song.title}"],
 					artist=song.artist,
 					title=song.title,
@@ -145,15 +261,18 @@ class RadioStation(Directories):
 		yield from self._links_for_nodes(link)
 
 	def _links_for_nodes(self, node_ids: list[int]) -> Iterator[Link]:
-		assert self.station.dj is not None
+		dj_audio_dir = self.station_dj_audio_directory
+		assert dj_audio_dir is not None
 
-		dj_audio_dir = self.dj_audio_directory / self.station.dj.station_name
 		for node in node_ids:
-			audio_files = dj_audio_dir / f"{node}_{len(self.audio_events[node])}.mp3"
-			subtitles = '\n'.join(self.subtitles[event.subtitle_ruid] for event in self.audio_events[node])
+			audio_file = self._node_audio_files.get(node)
+			if audio_file is None:
+				audio_file = dj_audio_dir / f"{node}_{len(self.audio_events[node])}.mp3"
+				self._node_audio_files[node] = audio_file
+
 			yield Link(
-					audio_files=[audio_files],
-					subtitles=[subtitles],
+					audio_files=[audio_file],
+					subtitles=[self._node_subtitles[node]],
 					start_delay=0.5,
 					inner_delay=0.5,
 					node_id=node,
@@ -171,7 +290,7 @@ class RadioStation(Directories):
 
 		for _ in range(ad_count):
 			advert = self.ad_list.pop()
-			audio_files.append(self.advert_audio_directory / f"{advert}.mp3")
+			audio_files.append(self._advert_audio_files[advert])
 			ad_names.append(f" - {advert}")
 
 		yield AdBreak(
@@ -195,9 +314,29 @@ class RadioStation(Directories):
 
 			yield from self._links_for_nodes([node])
 		else:
-			filename = self.stations_audio_directory / self.station.name / f"jingle_{node}.mp3"
+			filename = self.station_audio_directory / f"jingle_{node}.mp3"
 			yield Jingle(audio_files=[filename], start_delay=0.5)
 
+	def _get_break_options(self, last_action: type[Event]) -> tuple[list[type[Event]], list[float]]:
+		"""
+		Returns the event types which can be played between tunes, and their cumulative weights.
+
+		:param last_action: The last non-tune event type played, which is weighted against.
+		"""
+
+		break_options: dict[type[Event], float] = {}
+		if self.has_dj:
+			break_options[Link] = 2.0
+		if self.station.has_ads:
+			break_options[AdBreak] = 1.0
+		if self.station.has_jingles:
+			break_options[Jingle] = 1.0
+
+		# Weight it against the one that last happened
+		break_options[last_action] = 0.25
+
+		return list(break_options), list(itertools.accumulate(break_options.values()))
+
 	def get_events(self, force_jingle: bool = False) -> Iterator[Event]:
 		"""
 		Returns an iterator of events (tunes, DJ links, ad breaks etc.) for this radio station.
@@ -235,19 +374,19 @@ class RadioStation(Directories):
 			else:
 				yield from self.get_tunes()
 
+		# The options and weights only depend on the last action, so only build them once for each.
+		break_options: dict[type[Event], tuple[list[type[Event]], list[float]]] = {}
+
 		# Now loop, playing a link/jingle/ad break, and then music
 		while True:
-			break_options: dict[type[Event], float] = {}
-			if self.has_dj:
-				break_options[Link] = 2.0
-			if self.station.has_ads:
-				break_options[AdBreak] = 1.0
-			if self.station.has_jingles:
-				break_options[Jingle] = 1.0
-
-			# Weight it against the one that last happened
-			break_options[self._last_non_tune_action] = 0.25
-			option: type[Event] = random.choices(list(break_options), weights=list(break_options.values()), k=1)[0]
+			last_action = self._last_non_tune_action
+			assert last_action is not None
+
+			if last_action not in break_options:
+				break_options[last_action] = self._get_break_options(last_action)
+
+			options, cum_weights = break_options[last_action]
+			option: type[Event] = random.choices(options, cum_weights=cum_weights, k=1)[0]
 			self._last_non_tune_action = option
 
 			if option is Link:
@@ -286,9 +425,62 @@ class Radio:
 	#: The logo style to use in notifications. Either ``"white"`` for the station logo in white, or ``"album art"`` for the album art-style image (dark red background, blue logo).
 	notification_logo_style: str = "white"
 
+	#: Mapping of event types (and the handler name suffix) to the method which plays them.
+	_event_handlers: dict[tuple[type[Event], str], Callable]
+
+	#: The :func:`time.monotonic` time the last event finished, or :py:obj:`None` if none have been played yet.
+	_last_event_end: float | None = None
+
 	def __init__(self, station: RadioStation, player: Playback):
 		self.station = station
 		self.player = player
+		self._event_handlers = {}
+
+	def _get_event_handler(self, event_type: type[Event], suffix: str, default: Callable) -> Callable:
+		"""
+		Returns the ``play_<event_name><suffix>`` method for the event type, or ``default`` if there isn't one.
+
+		The method is looked up the first time each event type is played and then cached.
+
+		:param event_type:
+		:param suffix:
+		:param default:
+		"""
+
+		key = (event_type, suffix)
+		handler = self._event_handlers.get(key)
+
+		if handler is None:
+			event_name = to_snake_case(event_type.__name__)
+			handler = getattr(self, f"play_{event_name}{suffix}", default)
+			self._event_handlers[key] = handler
+
+		return handler
+
+	def _get_start_delay(self, event: Event) -> float:
+		"""
+		Returns how long to wait before playing the event.
+
+		The event's start delay is counted from the end of the previous event,
+		so time spent getting the next event ready doesn't lengthen the gap between them.
+
+		:param event:
+		"""
+
+		if self._last_event_end is None:
+			return event.start_delay
+
+		elapsed = time.monotonic() - self._last_event_end
+		return max(event.start_delay - elapsed, 0)
+
+	def reset_start_delay(self) -> None:
+		"""
+		Make the next event wait for its full start delay, rather than counting from the end of the previous event.
+
+		Called whenever playback of a station starts.
+		"""
+
+		self._last_event_end = None
 
 	def log(self, msg: str) -> None:
 		"""
@@ -297,15 +489,41 @@ class Radio:
 		:param msg:
 		"""
 
-		print('\n'.join(textwrap.wrap(msg, subsequent_indent="  ")))
+		print(_wrap_message(msg))
+
+	def prefetch(self, filename: PathLike) -> None:
+		"""
+		Read an audio file in a background thread, so it is cached by the time it is played.
+
+		Avoids a gap between files when loading from slow storage.
+
+		:param filename:
+		"""
+
+		threading.Thread(target=_read_file, args=(filename, ), daemon=True).start()
+
+	def _prefetch_next(self, event: Event, idx: int) -> None:
+		"""
+		Prefetch the audio file following the one at ``idx`` in the event, if there is one.
+
+		:param event:
+		:param idx:
+		"""
+
+		if idx + 1 < len(event.audio_files):
+			self.prefetch(event.audio_files[idx + 1])
 
 	def wait(self) -> None:
 		"""
 		Wait for audio playback to finish.
 		"""
 
+		# just_playback has no end-of-playback callback, so sleep until just before the end of the audio
+		# and then check again. Unlike AsyncRadio.wait this can't be cancelled, so the sleep is capped
+		# to still notice promptly if playback is stopped from elsewhere.
 		while self.player.active:
-			pass
+			remaining = self.player.duration - self.player.curr_pos
+			time.sleep(min(max(remaining - 0.05, 0.01), 0.5))
 
 	def _send_tune_notification(self, tune: Tune) -> None:
 		"""
@@ -315,9 +533,9 @@ class Radio:
 		"""
 
 		if self.notification_logo_style == "white":
-			icon_file = self.station.station_logos_directory.abspath() / f"{self.station.station.name}.png"
+			icon_file = self.station.station_logo_file
 		elif self.notification_logo_style == "album art":
-			icon_file = self.station.album_art_directory.abspath() / f"{self.station.station.name}.png"
+			icon_file = self.station.album_art_file
 		else:
 			raise ValueError(f"Invalid logo style {self.notification_logo_style!r}")
 
@@ -346,6 +564,7 @@ class Radio:
 
 			self.player.load_file(os.fspath(filename))
 			self.player.play()
+			self._prefetch_next(tune, idx)
 
 			if subtitles is not None:
 				self.log(subtitles)
@@ -387,15 +606,16 @@ class Radio:
 		"""
 
 		self.skip = False
-		event_name = to_snake_case(type(event).__name__)
-		event_fn = getattr(self, f"play_{event_name}", self._play_event)
+		event_fn = self._get_event_handler(type(event), '', self._play_event)
 
-		time.sleep(event.start_delay)
+		time.sleep(self._get_start_delay(event))
 		event_fn(event)
 
 		if not self.skip:
 			time.sleep(event.end_delay)
 
+		self._last_event_end = time.monotonic()
+
 	def _play_event(self, event: Event) -> None:
 		"""
 		Generic handler for playing events, where no specific function for the event type exists.
@@ -406,6 +626,7 @@ class Radio:
 		for idx, (filename, subtitles) in enumerate(event.iter_files()):
 			self.player.load_file(os.fspath(filename))
 			self.player.play()
+			self._prefetch_next(event, idx)
 
 			if subtitles is not None:
 				self.log(subtitles)
@@ -420,7 +641,11 @@ class Radio:
 		Play the station.
 		"""
 
-		for event in self.station.get_events(force_jingle=True):
+		self.reset_start_delay()
+
+		# Look one event ahead so its first file can be prefetched while the current one plays.
+		for event, next_event in itertools.pairwise(self.station.get_events(force_jingle=True)):
+			self.prefetch(next_event.audio_files[0])
 			self.play_event(event)
 
 
@@ -437,7 +662,10 @@ class AsyncRadio(Radio):
 		"""
 
 		while self.player.active:
-			await asyncio.sleep(0.1)
+			# Sleep until just before the end of the audio, then check again.
+			# If playback was paused in the meantime the remaining time is recalculated.
+			remaining = self.player.duration - self.player.curr_pos
+			await asyncio.sleep(max(remaining - 0.05, 0.01))
 
 	async def play_tune_async(self, tune: Tune) -> None:
 		"""
@@ -456,6 +684,7 @@ class AsyncRadio(Radio):
 
 			self.player.load_file(os.fspath(filename))
 			self.player.play()
+			self._prefetch_next(tune, idx)
 
 			# if subtitles is not None:
 			# 	self.log(subtitles)
@@ -497,15 +726,20 @@ class AsyncRadio(Radio):
 		"""
 
 		self.skip = False
-		event_name = to_snake_case(type(event).__name__)
-		event_fn: Callable[[Event], Coroutine] = getattr(self, f"play_{event_name}_async", self._play_event_async)
+		event_fn: Callable[[Event], Coroutine] = self._get_event_handler(
+				type(event),
+				"_async",
+				self._play_event_async,
+				)
 
-		await asyncio.sleep(event.start_delay)
+		await asyncio.sleep(self._get_start_delay(event))
 		await event_fn(event)
 
 		if not self.skip:
 			await asyncio.sleep(event.end_delay)
 
+		self._last_event_end = time.monotonic()
+
 	async def _play_event_async(self, event: Event) -> None:
 		"""
 		Generic handler for playing events, where no specific function for the event type exists.
@@ -516,6 +750,7 @@ class AsyncRadio(Radio):
 		for idx, (filename, subtitles) in enumerate(event.iter_files()):
 			self.player.load_file(os.fspath(filename))
 			self.player.play()
+			self._prefetch_next(event, idx)
 
 			if subtitles is not None:
 				self.log(subtitles)
@@ -530,5 +765,9 @@ class AsyncRadio(Radio):
 		Play the station.
 		"""
 
-		for event in self.station.get_events(force_jingle=True):
+		self.reset_start_delay()
+
+		# Look one event ahead so its first file can be prefetched while the current one plays.
+		for event, next_event in itertools.pairwise(self.station.get_events(force_jingle=True)):
+			self.prefetch(next_event.audio_files[0])
 			await self.play_event_async(event)
@@ -28,6 +28,8 @@ Textual widgets for terminal GUI.
 
 # stdlib
 import datetime
+import functools
+import time
 from typing import NamedTuple
 
 # 3rd party
@@ -75,7 +77,15 @@ class Clock(Digits):
 	"""
 
 	def on_mount(self) -> None:  # noqa: D102
-		self.set_interval(0.1, self.update_clock)
+		self.update_clock()
+
+		# The time is only shown to the second, so update once a second, just after the second changes.
+		# The small offset stops the timer firing fractionally early and showing the old time for another second.
+		self.set_timer(1.01 - time.time() % 1, self._start_clock)
+
+	def _start_clock(self) -> None:
+		self.update_clock()
+		self.set_interval(1, self.update_clock)
 
 	def update_clock(self) -> None:
 		"""
@@ -126,6 +136,29 @@ track_progress_animations = dict(
 		)
 
 
+@functools.lru_cache()
+def _get_animation_frames(animation: TrackProgressAnimation) -> tuple[str, ...]:
+	"""
+	Returns each frame of the animation.
+
+	The frames are cached, as the animation is redrawn every time the track position changes.
+
+	:param animation:
+	"""
+
+	chars, step = animation
+	return tuple(
+			''.join(chars[idx - (step * mult)] for mult in range(4, -1, -1)) for idx in range(len(chars))
+			)
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_seconds(seconds: int) -> str:
+	td = datetime.timedelta(seconds=seconds)
+	# td = datetime.timedelta(days=td.days, seconds=td.seconds, microseconds=0)
+	return str(td)
+
+
 class TrackProgressLabel(Label):
 	"""
 	Widget for displaying the current track position time, and the total track length.
@@ -153,10 +186,9 @@ class TrackProgressLabel(Label):
 		:param seconds:
 		"""
 
-		seconds = round(seconds)
-		td = datetime.timedelta(seconds=seconds)
-		# td = datetime.timedelta(days=td.days, seconds=td.seconds, microseconds=0)
-		return str(td)
+		# The position only changes every second or so, and the duration is fixed for each track,
+		# so most calls are answered from the cache.
+		return _format_seconds(round(seconds))
 
 	def render(self) -> str:  # noqa: D102
 		pos_td = self.format_time(seconds=self.track_position)
@@ -166,11 +198,10 @@ class TrackProgressLabel(Label):
 		if self.paused:  # 5 characters long
 			elements.append("  ⏸  ")
 		else:
-			animation = track_progress_animations[self.animation]
+			frames = _get_animation_frames(track_progress_animations[self.animation])
 			self.audio_bar_idx += 1
-			self.audio_bar_idx %= len(animation.chars)
-			bars = [animation.chars[self.audio_bar_idx - (animation.step * mult)] for mult in range(4, -1, -1)]
-			elements.append(''.join(bars))
+			self.audio_bar_idx %= len(frames)
+			elements.append(frames[self.audio_bar_idx])
 
 		elements.append(f"{pos_td} / {dur_td}")
 
@@ -266,18 +297,25 @@ class StationLogoRich(Label):
 
 	image: reactive[Image.Image | None] = reactive(None)
 
+	#: The logo converted to rich markup, updated when the image changes rather than on every render.
+	_rendered_logo: str = ''
+
 	def on_ready(self) -> None:  # noqa: D102
 		self.data_bind(StationLogoRich.image)
 
-	def render(self) -> str:  # noqa: D102
-		if self.image:
-			aspect = self.image.width / self.image.height
+	def watch_image(self, image: Image.Image | None) -> None:  # noqa: D102
+		if image:
+			aspect = image.width / image.height
 			if aspect < 1:
 				# Taller than wide
-				return logo_to_rich(self.image, 35)
+				self._rendered_logo = logo_to_rich(image, 35)
 			else:
-				return logo_to_rich(self.image, 45)
-		return ''
+				self._rendered_logo = logo_to_rich(image, 45)
+		else:
+			self._rendered_logo = ''
+
+	def render(self) -> str:  # noqa: D102
+		return self._rendered_logo
 
 
 class ThirdColumn(VerticalGroup):
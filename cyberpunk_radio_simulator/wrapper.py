@@ -33,12 +33,12 @@ Standalone terminal wrapper for the app.
 import posixpath
 import signal
 import sys
-import time
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING
 
 # 3rd party
 from desktop_media_control import SIGRAISE
 from domdf_python_tools.typing import PathLike
+from gi.repository import GLib  # nodep
 from textual_wrapper.keycodes import CTRL_P
 from textual_wrapper.types import MenuOption, Wrapper
 from textual_wrapper.wrapper import gtk
@@ -100,21 +100,37 @@ class WrapperWindow(gtk.WrapperWindow):
 		# print(f"{status=}")
 		sys.exit(status)
 
-	def on_raise_signal(self, signalnum: int, stack_frame: Any) -> None:
+	def on_raise_signal(self) -> bool:
 		"""
 		Handler for the raise signal (``SIGUSR1``) being sent to the application.
 
 		Brings the application to the foreground.
 
-		:param signalnum: The signal number.
-		:param stack_frame:
+		:returns: :py:obj:`True`, to keep handling the signal.
 		"""
 
-		if signalnum == SIGRAISE:
-			self.set_keep_above(True)
-			self.present()
-			time.sleep(0.001)
-			self.set_keep_above(False)
+		self.set_keep_above(True)
+		self.present()
+		# Unset once the main loop is idle again, rather than blocking it with a sleep.
+		GLib.idle_add(self._unset_keep_above)
+
+		return GLib.SOURCE_CONTINUE
+
+	def _unset_keep_above(self) -> bool:
+		self.set_keep_above(False)
+		return GLib.SOURCE_REMOVE
+
+	def on_interrupt_signal(self) -> bool:
+		"""
+		Handler for ``SIGINT`` being sent to the application (e.g. :kbd:`Ctrl+C` in the launching terminal).
+
+		Closes the wrapper window, which quits the GTK main loop.
+
+		:returns: :py:obj:`False`, as the window has been closed.
+		"""
+
+		self.destroy()
+		return GLib.SOURCE_REMOVE
 
 	def run(
 			self,
@@ -131,5 +147,8 @@ class WrapperWindow(gtk.WrapperWindow):
 		self.terminal.hide_cursor()
 		# TODO: disable selection (maybe clear selection when selection changes?)
 
-		signal.signal(SIGRAISE, self.on_raise_signal)
+		# Handled by the GLib main loop, which is woken as soon as the signal arrives,
+		# rather than by Python's signal module, which only runs the handler between bytecodes.
+		GLib.unix_signal_add(GLib.PRIORITY_HIGH, SIGRAISE, self.on_raise_signal)
+		GLib.unix_signal_add(GLib.PRIORITY_HIGH, signal.SIGINT, self.on_interrupt_signal)
 		super().run(arguments=arguments, working_directory=working_directory)